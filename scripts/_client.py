@@ -0,0 +1,70 @@
+"""
+Cliente TCP mínimo do CrabCache compartilhado pelos scripts de teste
+"""
+
+import socket
+
+
+def _encode(line):
+    """Aceita comandos já codificados em bytes sem recodificá-los"""
+    return line if isinstance(line, bytes) else line.encode()
+
+
+def read_stats_reply(rf):
+    """Lê uma resposta STATS completa de um leitor bufferizado (sem terminadores)
+
+    O servidor pode enviar as estatísticas como JSON formatado em várias
+    linhas (STATS: {...}); nesse caso lê até a linha com o "}" de fechamento.
+    """
+    lines = [rf.readline().rstrip(b"\r\n")]
+    if lines[0].endswith(b"{"):
+        while lines[-1] != b"}":
+            line = rf.readline()
+            if not line:
+                raise ConnectionError("conexão encerrada no meio da resposta STATS")
+            lines.append(line.rstrip(b"\r\n"))
+    return b"\n".join(lines).decode()
+
+
+class CrabcacheClient:
+    """Conexão persistente com o CrabCache usando o protocolo de texto"""
+
+    def __init__(self, host='localhost', port=8000, timeout=2.0, connect_timeout=0.5):
+        self.sock = socket.create_connection((host, port), timeout=connect_timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(timeout)
+        self.rf = self.sock.makefile('rb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Fecha o leitor bufferizado e o socket"""
+        self.rf.close()
+        self.sock.close()
+
+    def cmd(self, line):
+        """Envia um comando (str ou bytes) e retorna a linha de resposta (sem o terminador)"""
+        self.sock.sendall(_encode(line) + b"\n")
+        return self.rf.readline().rstrip(b"\r\n").decode()
+
+    def stats(self):
+        """Envia STATS e retorna a resposta completa, mesmo quando em várias linhas"""
+        self.sock.sendall(b"STATS\n")
+        return read_stats_reply(self.rf)
+
+    def pipeline(self, lines, batch_size=256):
+        """Envia os comandos em lotes de um sendall e lê uma resposta por comando
+
+        Limitar o lote evita que cliente e servidor fiquem bloqueados com os
+        buffers do socket cheios em pipelines muito longos.
+        """
+        responses = []
+        for start in range(0, len(lines), batch_size):
+            batch = lines[start:start + batch_size]
+            self.sock.sendall(b"\n".join(map(_encode, batch)) + b"\n")
+            responses.extend(self.rf.readline().rstrip(b"\r\n").decode() for _ in batch)
+        return responses
@@ -12,7 +12,6 @@ This script tests the advanced pipelining features:
 Target: 300,000+ ops/sec
 """
 
-import asyncio
 import socket
 import time
 import json
@@ -20,10 +19,15 @@ import statistics
 import argparse
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import threading
 import random
 
+# (level, option, value) applied to every benchmark connection
+SOCK_OPTS: List[Tuple[int, int, int]] = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+]
+
 @dataclass
 class BenchmarkConfig:
     """Configuration for advanced pipeline benchmark"""
@@ -79,6 +83,8 @@ class AdvancedPipelineBenchmark:
     def create_connection(self) -> socket.socket:
         """Create a new connection to CrabCache"""
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        for level, optname, value in SOCK_OPTS:
+            sock.setsockopt(level, optname, value)
         sock.settimeout(10.0)
         try:
             sock.connect((self.config.host, self.config.port))
@@ -152,7 +158,7 @@ class AdvancedPipelineBenchmark:
         
         return commands
     
-    def send_batch_pipelined(self, conn: socket.socket, commands: List[str]) -> tuple:
+    def send_batch_pipelined(self, conn: socket.socket, reader, commands: List[str]) -> tuple:
         """Send a batch of commands in pipeline mode"""
         start_time = time.time()
         
@@ -161,11 +167,10 @@ class AdvancedPipelineBenchmark:
             batch_data = "\n".join(commands) + "\n"
             conn.sendall(batch_data.encode())
             
-            # Read all responses
-            responses = []
-            for _ in commands:
-                response = conn.recv(4096).decode().strip()
-                responses.append(response)
+            # Read one newline-terminated response per command
+            responses = [reader.readline().decode().strip() for _ in commands]
+            if not responses[-1]:
+                raise ConnectionError("connection closed before all responses arrived")
             
             end_time = time.time()
             latency_ms = (end_time - start_time) * 1000
@@ -182,12 +187,14 @@ class AdvancedPipelineBenchmark:
                      batch_size: int, workload_type: str, results_queue: list):
         """Worker thread for concurrent testing"""
         conn = None
+        reader = None
         latencies = []
         successful_ops = 0
         failed_ops = 0
         
         try:
             conn = self.create_connection()
+            reader = conn.makefile('rb')
             
             operations_done = 0
             while operations_done < operations_per_worker:
@@ -195,7 +202,7 @@ class AdvancedPipelineBenchmark:
                 commands = self.generate_batch_commands(batch_size, workload_type)
                 
                 # Send batch
-                ops_count, latency_ms, success = self.send_batch_pipelined(conn, commands)
+                ops_count, latency_ms, success = self.send_batch_pipelined(conn, reader, commands)
                 
                 if success:
                     successful_ops += ops_count
@@ -209,6 +216,8 @@ class AdvancedPipelineBenchmark:
             print(f"Worker {worker_id} error: {e}")
         
         finally:
+            if reader:
+                reader.close()
             if conn:
                 conn.close()
         
@@ -265,8 +274,12 @@ class AdvancedPipelineBenchmark:
         if all_latencies:
             avg_latency = statistics.mean(all_latencies)
             p50_latency = statistics.median(all_latencies)
-            p95_latency = statistics.quantiles(all_latencies, n=20)[18] if len(all_latencies) > 20 else max(all_latencies)
-            p99_latency = statistics.quantiles(all_latencies, n=100)[98] if len(all_latencies) > 100 else max(all_latencies)
+            if len(all_latencies) > 100:
+                # One quantiles() pass yields both cut points
+                cuts = statistics.quantiles(all_latencies, n=100)
+                p95_latency, p99_latency = cuts[94], cuts[98]
+            else:
+                p95_latency = p99_latency = max(all_latencies)
             min_latency = min(all_latencies)
             max_latency = max(all_latencies)
         else:
@@ -344,16 +357,18 @@ class AdvancedPipelineBenchmark:
         
         def duration_worker(worker_id: int):
             conn = None
+            reader = None
             latencies = []
             successful_ops = 0
             failed_ops = 0
             
             try:
                 conn = self.create_connection()
+                reader = conn.makefile('rb')
                 
                 while time.time() < end_time:
                     commands = self.generate_batch_commands(batch_size, workload_type)
-                    ops_count, latency_ms, success = self.send_batch_pipelined(conn, commands)
+                    ops_count, latency_ms, success = self.send_batch_pipelined(conn, reader, commands)
                     
                     if success:
                         successful_ops += ops_count
@@ -365,6 +380,8 @@ class AdvancedPipelineBenchmark:
                 print(f"Duration worker {worker_id} error: {e}")
             
             finally:
+                if reader:
+                    reader.close()
                 if conn:
                     conn.close()
             
@@ -398,8 +415,12 @@ class AdvancedPipelineBenchmark:
         if all_latencies:
             avg_latency = statistics.mean(all_latencies)
             p50_latency = statistics.median(all_latencies)
-            p95_latency = statistics.quantiles(all_latencies, n=20)[18] if len(all_latencies) > 20 else max(all_latencies)
-            p99_latency = statistics.quantiles(all_latencies, n=100)[98] if len(all_latencies) > 100 else max(all_latencies)
+            if len(all_latencies) > 100:
+                # One quantiles() pass yields both cut points
+                cuts = statistics.quantiles(all_latencies, n=100)
+                p95_latency, p99_latency = cuts[94], cuts[98]
+            else:
+                p95_latency = p99_latency = max(all_latencies)
             min_latency = min(all_latencies)
             max_latency = max(all_latencies)
         else:
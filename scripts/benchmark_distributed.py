@@ -14,11 +14,9 @@ It tests various scenarios including:
 import asyncio
 import json
 import statistics
-import subprocess
 import time
 from dataclasses import dataclass
 from typing import List, Dict, Any
-import numpy as np
 
 @dataclass
 class BenchmarkResult:
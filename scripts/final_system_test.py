@@ -12,6 +12,8 @@ import json
 import sys
 from datetime import datetime
 
+from _client import read_stats_reply
+
 class CrabCacheSystemTest:
     """Complete system test for CrabCache"""
     
@@ -19,61 +21,60 @@ class CrabCacheSystemTest:
         self.host = host
         self.port = port
         self.socket = None
+        self.rfile = None
     
     def connect(self):
         """Connect to CrabCache server"""
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         self.socket.connect((self.host, self.port))
+        self.rfile = self.socket.makefile('rb', buffering=65536)
         print(f"✓ Connected to CrabCache at {self.host}:{self.port}")
     
     def disconnect(self):
         """Disconnect from server"""
+        if self.rfile:
+            self.rfile.close()
+            self.rfile = None
         if self.socket:
             self.socket.close()
             self.socket = None
     
     def send_command(self, command):
         """Send single command and receive response"""
-        self.socket.send(f"{command}\n".encode())
-        response = b""
-        while b"\n" not in response:
-            chunk = self.socket.recv(1024)
-            if not chunk:
-                break
-            response += chunk
-        return response.decode().strip()
+        self.socket.sendall(f"{command}\n".encode())
+        if command == "STATS":
+            return read_stats_reply(self.rfile)
+        return self.rfile.readline().decode().strip()
     
     def send_pipeline_batch(self, commands):
         """Send batch of commands using pipelining"""
         # Send all commands at once
         batch_data = "\n".join(commands) + "\n"
-        self.socket.send(batch_data.encode())
+        self.socket.sendall(batch_data.encode())
         
         # Receive all responses
         responses = []
-        response_buffer = b""
         
         # Add timeout to prevent hanging
         self.socket.settimeout(10.0)
         
         try:
             while len(responses) < len(commands):
-                chunk = self.socket.recv(4096)
-                if not chunk:
+                line = self.rfile.readline()
+                if not line:
                     break
-                response_buffer += chunk
-                
-                while b"\n" in response_buffer:
-                    line, response_buffer = response_buffer.split(b"\n", 1)
-                    if line:
-                        responses.append(line.decode().strip())
-                    if len(responses) >= len(commands):
-                        break
+                line = line.strip()
+                if line:
+                    responses.append(line.decode())
         except socket.timeout:
             print(f"Timeout waiting for responses. Got {len(responses)} out of {len(commands)}")
+            # The buffered reader is unusable after a timeout; start over on a fresh connection
+            self.disconnect()
+            self.connect()
         finally:
-            self.socket.settimeout(None)
+            if self.socket:
+                self.socket.settimeout(None)
         
         return responses
     
@@ -139,16 +140,16 @@ class CrabCacheSystemTest:
         num_ops = 100
         
         # Single commands
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         for i in range(num_ops):
             response = self.send_command(f"PUT single_{i} value_{i}")
-        single_time = time.time() - start_time
-        single_ops_per_sec = num_ops / single_time
+        single_elapsed_ns = time.perf_counter_ns() - start_time
+        single_ops_per_sec = num_ops * 1_000_000_000 // single_elapsed_ns
         
         # Pipeline batch
         batch_size = 10
         num_batches = num_ops // batch_size
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         for batch_idx in range(num_batches):
             batch_commands = []
@@ -158,13 +159,13 @@ class CrabCacheSystemTest:
             
             responses = self.send_pipeline_batch(batch_commands)
         
-        pipeline_time = time.time() - start_time
-        pipeline_ops_per_sec = num_ops / pipeline_time
+        pipeline_elapsed_ns = time.perf_counter_ns() - start_time
+        pipeline_ops_per_sec = num_ops * 1_000_000_000 // pipeline_elapsed_ns
         
-        improvement = pipeline_ops_per_sec / single_ops_per_sec
+        improvement = single_elapsed_ns / pipeline_elapsed_ns
         
-        print(f"✓ Single commands: {single_ops_per_sec:.0f} ops/sec")
-        print(f"✓ Pipeline batch: {pipeline_ops_per_sec:.0f} ops/sec")
+        print(f"✓ Single commands: {single_ops_per_sec} ops/sec")
+        print(f"✓ Pipeline batch: {pipeline_ops_per_sec} ops/sec")
         print(f"✓ Performance improvement: {improvement:.1f}x")
         
         assert improvement > 1.0, f"Pipeline should be faster, got {improvement:.1f}x"
@@ -199,15 +200,15 @@ class CrabCacheSystemTest:
         for i in range(3):
             mixed_commands.append(f"DEL mixed_key_{i + 10}")
         
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         responses = self.send_pipeline_batch(mixed_commands)
-        mixed_time = time.time() - start_time
+        mixed_elapsed_ns = time.perf_counter_ns() - start_time
         
-        mixed_ops_per_sec = len(mixed_commands) / mixed_time
+        mixed_ops_per_sec = len(mixed_commands) * 1_000_000_000 // mixed_elapsed_ns
         
         print(f"✓ Mixed workload: {len(mixed_commands)} operations")
-        print(f"✓ Performance: {mixed_ops_per_sec:.0f} ops/sec")
-        print(f"✓ Time taken: {mixed_time*1000:.2f}ms")
+        print(f"✓ Performance: {mixed_ops_per_sec} ops/sec")
+        print(f"✓ Time taken: {mixed_elapsed_ns / 1e6:.2f}ms")
         
         # Verify some responses
         get_responses = responses[:8]  # First 8 are GET operations
@@ -229,18 +230,18 @@ class CrabCacheSystemTest:
         for i in range(large_batch_size):
             commands.append(f"PUT stress_key_{i} stress_value_{i}")
         
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         responses = self.send_pipeline_batch(commands)
-        stress_time = time.time() - start_time
+        stress_elapsed_ns = time.perf_counter_ns() - start_time
         
         assert len(responses) == large_batch_size, f"Expected {large_batch_size} responses, got {len(responses)}"
         assert all(r == "OK" for r in responses), "Not all PUT operations succeeded"
         
-        stress_ops_per_sec = large_batch_size / stress_time
+        stress_ops_per_sec = large_batch_size * 1_000_000_000 // stress_elapsed_ns
         
         print(f"✓ Large batch: {large_batch_size} operations")
-        print(f"✓ Performance: {stress_ops_per_sec:.0f} ops/sec")
-        print(f"✓ Time taken: {stress_time*1000:.2f}ms")
+        print(f"✓ Performance: {stress_ops_per_sec} ops/sec")
+        print(f"✓ Time taken: {stress_elapsed_ns / 1e6:.2f}ms")
         
         # Verify data integrity
         verify_commands = [f"GET stress_key_{i}" for i in range(10)]  # Check first 10
@@ -3,50 +3,84 @@
 Teste simples e direto das funcionalidades CrabCache
 """
 
-import socket
+import asyncio
+import http.client
+import os
+import sys
 import time
 import subprocess
-import json
+from contextlib import AsyncExitStack, asynccontextmanager
 
-def test_basic_functionality():
+from _client import CrabcacheClient
+
+IMAGE = "crabcache:latest-wal-async"
+
+async def docker(*args, capture=False, timeout=10):
+    """Executa um comando docker sem bloquear o loop de eventos"""
+    proc = await asyncio.create_subprocess_exec(
+        "docker", *args,
+        stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, (stdout or b"").decode(), stderr.decode().strip()
+
+def network_args():
+    """Opções de rede do container de teste
+
+    --network=host evita o docker-proxy, mas só expõe as portas ao host no
+    Linux; no Docker Desktop (macOS/Windows) o container roda numa VM, então
+    ali as portas são publicadas com -p. CRABCACHE_TEST_HOST_NETWORK=1/0
+    força uma ou outra opção.
+    """
+    host_network = os.environ.get("CRABCACHE_TEST_HOST_NETWORK")
+    if not host_network:
+        use_host = sys.platform == "linux"
+    else:
+        use_host = host_network == "1"
+    if use_host:
+        return ["--network=host", "-e", "CRABCACHE_BIND_ADDR=127.0.0.1"]
+    return ["-p", "8000:8000", "-p", "9090:9090"]
+
+async def image_present():
+    """Verifica se a imagem de teste já existe localmente"""
+    returncode, _, _ = await docker("image", "inspect", IMAGE)
+    return returncode == 0
+
+def test_basic_functionality(client):
     """Testa funcionalidades básicas com container já rodando"""
     print("🔧 Testando funcionalidades básicas...")
     
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(10)
-        sock.connect(('localhost', 8000))
-        
-        def send_cmd(cmd):
-            sock.send((cmd + '\n').encode())
-            response = sock.recv(4096).decode().strip()
-            return response
-        
         # Test PING
-        response = send_cmd("PING")
+        response = client.cmd("PING")
         print(f"PING: {response}")
         assert "PONG" in response
         
         # Test PUT/GET simples
-        response = send_cmd("PUT test_key test_value")
+        response = client.cmd("PUT test_key test_value")
         print(f"PUT test_key: {response}")
         
-        response = send_cmd("GET test_key")
+        response = client.cmd("GET test_key")
         print(f"GET test_key: {response}")
         
         # Test PUT com TTL
-        response = send_cmd("PUT ttl_key ttl_value 10")
+        response = client.cmd("PUT ttl_key ttl_value 10")
         print(f"PUT com TTL: {response}")
         
         # Test DELETE
-        response = send_cmd("DEL test_key")
+        response = client.cmd("DEL test_key")
         print(f"DEL test_key: {response}")
         
         # Test STATS
-        response = send_cmd("STATS")
+        response = client.stats()
         print(f"STATS (primeiras 200 chars): {response[:200]}...")
         
-        sock.close()
         print("✅ Funcionalidades básicas OK")
         return True
         
@@ -58,74 +92,73 @@ def test_metrics_endpoints():
     """Testa endpoints de métricas"""
     print("\n📊 Testando endpoints de métricas...")
     
+    conn = http.client.HTTPConnection('localhost', 9090, timeout=5)
+    
+    def get(path):
+        conn.request('GET', path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    
     try:
-        import requests
-        
         # Test Prometheus
-        response = requests.get("http://localhost:9090/metrics", timeout=5)
-        if response.status_code == 200:
+        status, body = get('/metrics')
+        if status == 200:
             print("✅ Prometheus endpoint OK")
-            print(f"   Métricas encontradas: {response.text.count('crabcache_')}")
+            print(f"   Métricas encontradas: {body.count(b'crabcache_')}")
         else:
-            print(f"❌ Prometheus falhou: {response.status_code}")
+            print(f"❌ Prometheus falhou: {status}")
         
         # Test Health
-        response = requests.get("http://localhost:9090/health", timeout=5)
-        if response.status_code == 200:
+        status, body = get('/health')
+        if status == 200:
             print("✅ Health endpoint OK")
-            print(f"   Status: {response.text}")
+            print(f"   Status: {body.decode()}")
         else:
-            print(f"❌ Health falhou: {response.status_code}")
+            print(f"❌ Health falhou: {status}")
         
         # Test Dashboard
-        response = requests.get("http://localhost:9090/dashboard", timeout=5)
-        if response.status_code == 200:
+        status, _ = get('/dashboard')
+        if status == 200:
             print("✅ Dashboard endpoint OK")
         else:
-            print(f"❌ Dashboard falhou: {response.status_code}")
+            print(f"❌ Dashboard falhou: {status}")
         
         return True
         
+    except ConnectionRefusedError:
+        print("❌ Porta de métricas 9090 não está acessível (o container publica a porta de métricas?)")
+        return False
     except Exception as e:
         print(f"❌ Erro nos endpoints: {e}")
         return False
+    finally:
+        conn.close()
 
-def test_performance():
+def test_performance(client):
     """Teste básico de performance"""
     print("\n🚀 Testando performance...")
     
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(10)
-        sock.connect(('localhost', 8000))
-        
-        def send_cmd(cmd):
-            sock.send((cmd + '\n').encode())
-            response = sock.recv(4096).decode().strip()
-            return response
-        
         # Teste de throughput
         operations = 100
-        start_time = time.time()
+        put_commands = [b"PUT perf_key_%d perf_value_%d" % (i, i) for i in range(operations)]
+        get_commands = [b"GET perf_key_%d" % i for i in range(operations)]
         
-        for i in range(operations):
-            send_cmd(f"PUT perf_key_{i} perf_value_{i}")
+        start_time = time.perf_counter_ns()
+        client.pipeline(put_commands)
         
-        put_time = time.time() - start_time
-        put_ops_per_sec = operations / put_time
+        put_elapsed_ns = time.perf_counter_ns() - start_time
+        put_ops_per_sec = operations * 1_000_000_000 // put_elapsed_ns
         
-        start_time = time.time()
-        for i in range(operations):
-            send_cmd(f"GET perf_key_{i}")
+        start_time = time.perf_counter_ns()
+        client.pipeline(get_commands)
         
-        get_time = time.time() - start_time
-        get_ops_per_sec = operations / get_time
+        get_elapsed_ns = time.perf_counter_ns() - start_time
+        get_ops_per_sec = operations * 1_000_000_000 // get_elapsed_ns
         
         print(f"📊 Performance:")
-        print(f"   PUT: {put_ops_per_sec:.0f} ops/sec")
-        print(f"   GET: {get_ops_per_sec:.0f} ops/sec")
-        
-        sock.close()
+        print(f"   PUT: {put_ops_per_sec} ops/sec ({put_elapsed_ns // operations // 1000} µs/op)")
+        print(f"   GET: {get_ops_per_sec} ops/sec ({get_elapsed_ns // operations // 1000} µs/op)")
         
         if put_ops_per_sec > 500 and get_ops_per_sec > 500:
             print("✅ Performance OK")
@@ -138,70 +171,169 @@ def test_performance():
         print(f"❌ Erro na performance: {e}")
         return False
 
-def main():
-    print("🚀 CrabCache - Teste Simples de Validação")
-    print("=" * 50)
-    
-    # Verifica se há container rodando
+async def health_ok(port=9090, timeout=0.5):
+    """Consulta /health uma vez e indica se o servidor respondeu 200"""
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection('localhost', port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    try:
+        writer.write(b"GET /health HTTP/1.0\r\nHost: localhost\r\n\r\n")
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        return status_line.split()[1:2] == [b"200"]
+    except (OSError, asyncio.TimeoutError):
+        return False
+    finally:
+        writer.close()
+
+async def wait_ready(port=9090, timeout=30):
+    """Aguarda /health responder, com backoff exponencial entre as tentativas"""
+    deadline = time.monotonic() + timeout
+    delay = 0.02
+    while time.monotonic() < deadline:
+        if await health_ok(port):
+            return True
+        await asyncio.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+        delay = min(delay * 1.5, 0.5)
+    raise TimeoutError(f"CrabCache não ficou pronto em {timeout}s")
+
+async def wait_tcp(addr, timeout=30):
+    """Aguarda a porta aceitar conexões TCP, tentando a cada 20ms"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(*addr), 0.2)
+            writer.close()
+            return True
+        except (OSError, asyncio.TimeoutError):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"{addr[0]}:{addr[1]} não aceitou conexões em {timeout}s")
+            await asyncio.sleep(0.02)
+
+@asynccontextmanager
+async def crabcache_container(name="crabcache-simple-test", timeout=30):
+    """Garante um CrabCache rodando e pronto para os testes
+
+    Reaproveita um container CrabCache já em execução; só remove ao final o
+    container que ele mesmo criou.
+    """
+    started = False
     try:
-        result = subprocess.run(["docker", "ps"], capture_output=True, text=True)
-        if "crabcache" not in result.stdout:
+        # Verifica se há container rodando (e a imagem local, em paralelo)
+        (_, running, _), has_image = await asyncio.gather(
+            docker("ps", "-q", "-f", "name=crabcache", capture=True, timeout=5),
+            image_present(),
+        )
+        if not running.strip():
             print("⚠️ Nenhum container CrabCache detectado rodando")
             print("Iniciando container de teste...")
             
-            subprocess.run([
-                "docker", "run", "-d", "--name", "crabcache-simple-test",
-                "-p", "8000:8000", "-p", "9090:9090",
-                "crabcache:latest-wal-async"
-            ], check=True)
+            if not has_image:
+                print(f"📥 Imagem {IMAGE} não encontrada localmente, baixando...")
+                returncode, _, error = await docker("pull", IMAGE, timeout=None)
+                if returncode != 0:
+                    raise RuntimeError(f"docker pull {IMAGE} falhou: {error}")
             
-            print("⏳ Aguardando inicialização...")
-            time.sleep(5)
-    except Exception as e:
-        print(f"❌ Erro ao verificar/iniciar container: {e}")
-        return 1
-    
-    tests = [
-        ("Funcionalidades Básicas", test_basic_functionality),
-        ("Endpoints de Métricas", test_metrics_endpoints),
-        ("Performance Básica", test_performance),
-    ]
+            try:
+                returncode, _, error = await docker(
+                    "run", "-d", "--pull=never", "--name", name,
+                    *network_args(), "-e", "CRABCACHE_PORT=8000",
+                    IMAGE,
+                    timeout=60,
+                )
+            except asyncio.TimeoutError:
+                # O daemon pode ter criado o container mesmo com o CLI
+                # interrompido; marca para o finally removê-lo
+                started = True
+                raise RuntimeError("docker run não terminou em 60s") from None
+            if returncode != 0:
+                raise RuntimeError(f"docker run falhou: {error}")
+            started = True
+        
+        print("⏳ Aguardando inicialização...")
+        if started:
+            # O /health (porta 9090) só é garantido no container criado aqui;
+            # um container reaproveitado pode não publicar a porta de métricas
+            await wait_ready(timeout=timeout)
+        await wait_tcp(('localhost', 8000), timeout=timeout)
+        
+        yield
+    finally:
+        if started:
+            try:
+                await docker("rm", "-f", name)
+            except Exception:
+                pass
+
+def connect_client():
+    """Abre a conexão com o CrabCache, ou retorna None se o servidor não aceitar"""
+    try:
+        return CrabcacheClient('localhost', 8000)
+    except OSError as e:
+        print(f"❌ Não foi possível conectar ao CrabCache: {e}")
+        return None
+
+async def main():
+    print("🚀 CrabCache - Teste Simples de Validação")
+    print("=" * 50)
     
-    results = []
-    for test_name, test_func in tests:
-        print(f"\n{'='*20} {test_name} {'='*20}")
+    async with AsyncExitStack() as stack:
         try:
-            result = test_func()
-            results.append((test_name, result))
+            await stack.enter_async_context(crabcache_container())
         except Exception as e:
-            print(f"❌ Erro no teste {test_name}: {e}")
-            results.append((test_name, False))
+            print(f"❌ Erro ao verificar/iniciar container: {e}")
+            return 1
+        
+        # Uma única conexão compartilhada pelos testes que usam o protocolo;
+        # o callback fecha a conexão em uso no final, mesmo se foi substituída
+        client = connect_client()
+        stack.callback(lambda: client and client.close())
+        
+        tests = [
+            ("Funcionalidades Básicas", test_basic_functionality, True),
+            ("Endpoints de Métricas", test_metrics_endpoints, False),
+            ("Performance Básica", test_performance, True),
+        ]
+        
+        # Os testes compartilham o mesmo container e rodam em sequência
+        results = []
+        for test_name, test_func, uses_client in tests:
+            print(f"\n{'='*20} {test_name} {'='*20}")
+            if uses_client and client is None:
+                client = connect_client()
+                if client is None:
+                    results.append((test_name, False))
+                    continue
+            try:
+                result = test_func(client) if uses_client else test_func()
+            except Exception as e:
+                print(f"❌ Erro no teste {test_name}: {e}")
+                result = False
+            results.append((test_name, result))
+            if uses_client and not result:
+                # Uma falha pode deixar respostas pendentes (ou um timeout) na
+                # conexão; o próximo teste começa com uma conexão nova
+                client.close()
+                client = None
     
     # Resumo
     print("\n" + "="*50)
     print("📋 RESUMO")
     print("="*50)
     
-    passed = sum(1 for _, result in results if result)
+    passed = sum(result for _, result in results)
     total = len(results)
+    percent = passed / total if total else 0.0
     
     for test_name, result in results:
         status = "✅ PASSOU" if result else "❌ FALHOU"
         print(f"{test_name:.<30} {status}")
     
     print("-" * 50)
-    print(f"Total: {passed}/{total} ({passed/total:.1%})")
-    
-    # Cleanup
-    try:
-        subprocess.run(["docker", "stop", "crabcache-simple-test"], 
-                      capture_output=True, timeout=10)
-        subprocess.run(["docker", "rm", "crabcache-simple-test"], 
-                      capture_output=True, timeout=10)
-    except:
-        pass
+    print(f"Total: {passed}/{total} ({percent:.1%})")
     
     return 0 if passed == total else 1
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    exit(asyncio.run(main()))